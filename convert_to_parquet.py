@@ -0,0 +1,59 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CSV_PATH = "Database/combined_data.csv"
+PARQUET_PATH = "Database/combined_data.parquet"
+CHUNK_SIZE = 500_000
+
+# Fixed, sorted categories so every chunk shares the same dictionary
+CATEGORIES = {
+    'ESTADO': pd.CategoricalDtype([
+        'ac', 'al', 'am', 'ap', 'ba', 'ce', 'df', 'es', 'go', 'ma', 'mg', 'ms', 'mt', 'pa',
+        'pb', 'pe', 'pi', 'pr', 'rj', 'rn', 'ro', 'rr', 'rs', 'sc', 'se', 'sp', 'to'
+    ]),
+    'PRODUTO': pd.CategoricalDtype([
+        'etanolhidratado', 'gasolinac', 'gasolinadeaviacao', 'glp',
+        'oleocombustivel', 'oleodiesel', 'querosenedeaviacao', 'queroseneiluminante'
+    ]),
+}
+
+def prepare_chunk(chunk):
+    """Rename and type one chunk of the raw CSV."""
+    chunk = chunk.rename(columns={
+        'timestamp': 'DATA',
+        'state': 'ESTADO',
+        'product': 'PRODUTO',
+        'm3': 'QUANTIDADE_M3'
+    })
+
+    # float32 is enough precision for volumes in m³ and halves the column's memory
+    chunk['QUANTIDADE_M3'] = chunk['QUANTIDADE_M3'].astype('float32')
+
+    # Dictionary-encode the low-cardinality dimensions (stored as Parquet dictionaries)
+    for column, dtype in CATEGORIES.items():
+        encoded = chunk[column].astype(dtype)
+        unknown = chunk[column][encoded.isna() & chunk[column].notna()].unique()
+        if len(unknown):
+            raise ValueError(f"Unknown {column} values: {list(unknown)}")
+        chunk[column] = encoded
+    return chunk
+
+def convert(csv_path, parquet_path, chunksize=CHUNK_SIZE):
+    """Stream the raw CSV into the Parquet file read by the app, one chunk at a time."""
+    chunks = pd.read_csv(csv_path, sep=";", usecols=['timestamp', 'state', 'product', 'm3'],
+                         parse_dates=['timestamp'], chunksize=chunksize)
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(prepare_chunk(chunk), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+if __name__ == "__main__":
+    convert(CSV_PATH, PARQUET_PATH)
@@ -1,30 +1,32 @@
-import warnings
+import numpy as np
 import pandas as pd
 import streamlit as st
-from statsmodels.tsa.seasonal import seasonal_decompose
 import plotly.express as px
 import google.generativeai as genai
 import os
+from datetime import date
 from dotenv import load_dotenv
 
-# Filter out the specific warnings
-warnings.filterwarnings("ignore", message="A date index has been provided, but it has no associated frequency information*")
-warnings.filterwarnings("ignore", message="No supported index is available. Prediction results will be given with an integer index beginning at `start`.*")
-warnings.filterwarnings("ignore", message="No supported index is available.*")
-
+@st.cache_data(show_spinner=False)
 def load_data(file_path):
-    """Load data from CSV file."""
-    return pd.read_csv(file_path, sep=";")
+    """Load data from Parquet file and index it by (state, product) (cached across reruns)."""
+    data = pd.read_parquet(file_path, columns=['DATA', 'ESTADO', 'PRODUTO', 'QUANTIDADE_M3'])
 
-def is_valid_date(date_str):
-    """Function to check if the input is a valid date"""
-    try:
-        pd.to_datetime(date_str)
-        return True
-    except ValueError:
-        return False
+    # Ordena uma única vez por data (estável, preservando a ordem dentro de cada data)
+    data = data.sort_values('DATA', kind='stable', ignore_index=True)
+
+    # Série temporal de cada par (estado, produto), indexada e ordenada por data
+    series_map = {
+        (state, product): group.set_index('DATA')['QUANTIDADE_M3'].sort_index()
+        for (state, product), group in data.groupby(['ESTADO', 'PRODUTO'], sort=False, observed=True)
+    }
+    return data, series_map
+
+def is_valid_date(value):
+    """Function to check if the input is a valid date (st.date_input returns date objects)"""
+    return isinstance(value, date)
 
-def validate_fields(state, product, period_date):
+def validate_fields(state, product, period_date, series_map):
     """Check if all fields are filled and if the dates are in the correct position"""
     if state and product and len(period_date) == 2:
         if not is_valid_date(period_date[0]):
@@ -38,9 +40,11 @@ def validate_fields(state, product, period_date):
         start_date = pd.to_datetime(period_date[0])
         end_date = pd.to_datetime(period_date[1])
 
-        # Check if the period is longer than 24 months
-        if (end_date - start_date).days <= 24 * 30:  # assuming 30 days per month
-            st.warning("The period cannot be less than 24 months! This is because the time series used for seasonal decomposition doesn't have enough data for accurate seasonal decomposition. The 'season_decompose' method from the Statsmodels library requires at least 24 observations to calculate seasonal decomposition accurately.")
+        # Check if the period has at least 24 monthly observations (a pair without data has none)
+        series = series_map.get((state, product))
+        n_obs = 0 if series is None else series.loc[start_date:end_date].shape[0]
+        if n_obs < 24:
+            st.warning("The period must contain at least 24 monthly observations! This is because the additive seasonal decomposition with a 12-month period needs at least two full cycles (24 observations) to be calculated accurately.")
             return False
 
         return True
@@ -57,80 +61,109 @@ def display_plot():
     """Display plot."""
     st.header("Dashboard")
 
-def decompose_time_series(data):
+@st.cache_data(show_spinner=False)
+def decompose_series(example_ts, period=12):
+    """Additive seasonal decomposition of a monthly series (cached per series)."""
+    values = example_ts.to_numpy(dtype=np.float32)
+
+    # Tendência: média móvel centrada (2x12 para período par), sem valores nas bordas
+    if period % 2 == 0:
+        kernel = np.r_[0.5, np.ones(period - 1), 0.5].astype(np.float32) / period
+    else:
+        kernel = np.ones(period, dtype=np.float32) / period
+    trend = np.full_like(values, np.nan)
+    trend[period // 2:-(period // 2)] = np.convolve(values, kernel, mode='valid')
+
+    # Sazonalidade: média de cada posição do período na série sem tendência, centrada em zero
+    detrended = values - trend
+    period_averages = np.array([np.nanmean(detrended[i::period]) for i in range(period)])
+    period_averages -= period_averages.mean()
+    seasonal = np.tile(period_averages, len(values) // period + 1)[:len(values)]
+
+    resid = values - trend - seasonal
+    return trend, seasonal, resid
+
+def plot_decomposition(example_ts, selected_state, selected_product):
+    """Build the original series and decomposition component figures."""
+    # Plot da série temporal original
+    fig_original = px.line(example_ts.reset_index(), x='DATA',
+                        y='QUANTIDADE_M3', title='Original Time Series')
+
+    # Decomposição da série temporal
+    trend, seasonal, resid = decompose_series(example_ts)
+
+    # Plot dos componentes da decomposição
+    fig_trend = px.line(x=example_ts.index, y=trend)
+    fig_seasonal = px.line(x=example_ts.index, y=seasonal)
+    fig_residual = px.scatter(x=example_ts.index, y=resid)
+
+    # Estilo dos gráficos
+    fig_trend.update_layout(title=f'Trend Component of product {selected_product} in state {selected_state}',
+                            xaxis_title='Date',
+                            yaxis_title='Quantity (cubic meters)')
+    fig_seasonal.update_layout(title=f'Seasonal Component of product {selected_product} in state {selected_state}',
+                            xaxis_title='Date',
+                            yaxis_title='Quantity (cubic meters)')
+    fig_residual.update_layout(title=f'Residual Component {selected_product} in state {selected_state}',
+                            xaxis_title='Date',
+                            yaxis_title='Quantity (cubic meters)')
+
+    return fig_original, fig_trend, fig_seasonal, fig_residual
+
+def decompose_time_series(data, series_map):
     """Decompose time series."""
     st.title('Decomposição de Séries Temporais')
     st.markdown("""
         Para gerar a decomposição de uma série temporal, selecione apenas 1 estado e um produto específico.
     """)
 
-    example_data = data[['DATA', 'ESTADO', 'PRODUTO', 'QUANTIDADE_M3']]
+    # Opções e limites de data calculados uma única vez por execução
+    states = data['ESTADO'].cat.categories
+    products = data['PRODUTO'].cat.categories
+    min_date = data['DATA'].iloc[0]
+    max_date = data['DATA'].iloc[-1]
 
     # Inicialize o session state se ainda não estiver configurado
     if 'selected_state' not in st.session_state:
-        st.session_state['selected_state'] = example_data['ESTADO'].unique()[0]
+        st.session_state['selected_state'] = data['ESTADO'].iloc[0]
     if 'selected_product' not in st.session_state:
-        st.session_state['selected_product'] = example_data['PRODUTO'].unique()[0]
+        st.session_state['selected_product'] = data['PRODUTO'].iloc[0]
     if 'period_date' not in st.session_state:
-        st.session_state['period_date'] = (example_data['DATA'].min(), example_data['DATA'].max())
+        st.session_state['period_date'] = (min_date, max_date)
     if 'button_disabled' not in st.session_state:
         st.session_state['button_disabled'] = False
     if 'explanation_text' not in st.session_state:
         st.session_state['explanation_text'] = ""
+    if 'fig_cache' not in st.session_state:
+        st.session_state['fig_cache'] = {}
 
     selected_state = st.selectbox(
-        'Select a state:', example_data['ESTADO'].unique(), key='selected_state')
+        'Select a state:', states, key='selected_state')
     selected_product = st.selectbox(
-        'Select a product:', example_data['PRODUTO'].unique(), key='selected_product')
+        'Select a product:', products, key='selected_product')
     period_date = st.date_input("Pick a date", value=st.session_state['period_date'], 
-                                min_value=example_data['DATA'].min(), 
-                                max_value=example_data['DATA'].max(), 
+                                min_value=min_date, 
+                                max_value=max_date, 
                                 format="MM.DD.YYYY", key='period_date')
 
     if st.button('Gerar'):
         # Validation and generation
-        if validate_fields(selected_state, selected_product, period_date):
+        if validate_fields(selected_state, selected_product, period_date, series_map):
             period_date_start = pd.to_datetime(period_date[0])
             period_date_end = pd.to_datetime(period_date[1])
 
-            # Filtra os dados com base nas seleções
-            filtered_data = example_data[
-                (example_data['ESTADO'] == selected_state) & 
-                (example_data['PRODUTO'] == selected_product) &
-                (example_data['DATA'] >= period_date_start) &
-                (example_data['DATA'] <= period_date_end)]
-    
+            # Seleciona a série pré-indexada e recorta o período pelo índice ordenado
+            example_ts = series_map[(selected_state, selected_product)].loc[period_date_start:period_date_end]
 
-            # Plot da série temporal original
-            fig_original = px.line(filtered_data, x=filtered_data["DATA"],
-                                y='QUANTIDADE_M3', title='Original Time Series')
-
-            # Salva o gráfico na sessão
-            st.session_state['fig_original'] = fig_original
-
-            # Prepara os dados para análise de séries temporais
-            example_ts = filtered_data.set_index('DATA')['QUANTIDADE_M3']
-
-            # Decomposição da série temporal
-            decomposition = seasonal_decompose(example_ts, model='additive', period=12)
-
-            # Plot dos componentes da decomposição
-            fig_trend = px.line(x=decomposition.trend.index, y=decomposition.trend)
-            fig_seasonal = px.line(x=decomposition.seasonal.index, y=decomposition.seasonal)
-            fig_residual = px.scatter(x=decomposition.resid.index, y=decomposition.resid)
-
-            # Estilo dos gráficos
-            fig_trend.update_layout(title=f'Trend Component of product {selected_product} in state {selected_state}',
-                                    xaxis_title='Date',
-                                    yaxis_title='Quantity (cubic meters)')
-            fig_seasonal.update_layout(title=f'Seasonal Component of product {selected_product} in state {selected_state}',
-                                    xaxis_title='Date',
-                                    yaxis_title='Quantity (cubic meters)')
-            fig_residual.update_layout(title=f'Residual Component {selected_product} in state {selected_state}',
-                                    xaxis_title='Date',
-                                    yaxis_title='Quantity (cubic meters)')
+            # Reaproveita os gráficos já gerados para a mesma seleção
+            signature = (selected_state, selected_product, period_date_start, period_date_end)
+            if signature not in st.session_state['fig_cache']:
+                st.session_state['fig_cache'][signature] = plot_decomposition(
+                    example_ts, selected_state, selected_product)
+            fig_original, fig_trend, fig_seasonal, fig_residual = st.session_state['fig_cache'][signature]
 
             # Salva os gráficos na sessão
+            st.session_state['fig_original'] = fig_original
             st.session_state['fig_trend'] = fig_trend
             st.session_state['fig_seasonal'] = fig_seasonal
             st.session_state['fig_residual'] = fig_residual
@@ -157,22 +190,12 @@ def gerar_explicacoes(period_date_start, period_date_end):
 
 def main():
     """Main function."""
-    data = load_data("Database//combined_data.csv")
+    data, series_map = load_data("Database//combined_data.parquet")
     load_dotenv()
 
     API_KEY = os.getenv("API_KEY")
     genai.configure(api_key=API_KEY)
 
-    data.rename(columns={
-        'timestamp': 'DATA', 
-        'state': 'ESTADO', 
-        'product': 'PRODUTO', 
-        'm3': 'QUANTIDADE_M3'
-    }, inplace=True)
-    
-    # Convert the date column to datetime format
-    data['DATA'] = pd.to_datetime(data['DATA'])
-    
     st.set_page_config(layout="wide")
     
     tab1, tab2, tab3, tab4 = st.tabs(["Início", "Dashboard", "Decomposição de Séries Temporais", "Base de Dados"])
@@ -187,7 +210,7 @@ def main():
         display_plot()
 
     with tab3:
-        decompose_time_series(data)
+        decompose_time_series(data, series_map)
         
     with tab4:
         display_data_overview(data)